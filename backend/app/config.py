@@ -17,6 +17,16 @@ class Settings(BaseSettings):
     )
     github_proxy: Optional[str] = Field(default=None, alias="GITHUB_PROXY")
     cache_ttl_seconds: int = Field(default=3600, alias="CACHE_TTL_SECONDS")
+    cache_max_entries: int = Field(default=1024, alias="CACHE_MAX_ENTRIES")
+    # short TTL for empty / failed GitHub searches to absorb transient hiccups
+    negative_cache_ttl_seconds: int = Field(default=30, alias="NEGATIVE_CACHE_TTL_SECONDS")
+    # LLM replies barely change for identical prompts, so they live much longer than search results
+    llm_cache_ttl_seconds: int = Field(default=21600, alias="LLM_CACHE_TTL_SECONDS")
+    # "memory" (per process) or "redis" (shared across workers / restarts, needs REDIS_URL)
+    llm_cache_backend: str = Field(default="memory", alias="LLM_CACHE_BACKEND")
+    redis_url: Optional[str] = Field(default=None, alias="REDIS_URL")
+    # max simultaneous reasoner LLM calls per process, keeps bursts under provider rate limits
+    llm_concurrency: int = Field(default=5, alias="LLM_CONCURRENCY")
     cors_origins: list[str] = Field(default=["*"], alias="CORS_ORIGINS")
 
     class Config:
@@ -1,24 +1,35 @@
 from typing import Protocol, List, Optional
 
+import msgspec
 
-class RepoCandidate(dict):
-    """Lightweight mapping to hold repository metadata."""
 
-    full_name: str
-    html_url: str
-    description: Optional[str]
-    language: Optional[str]
-    stargazers_count: int
-    forks_count: int
-    open_issues_count: int
-    updated_at: str
-    topics: List[str]
-    default_branch: str
-    owner_type: Optional[str]
-    license: Optional[str]
+class RepoCandidate(msgspec.Struct, kw_only=True):
+    """Slotted record holding repository metadata."""
+
+    full_name: Optional[str] = None
+    html_url: Optional[str] = None
+    description: Optional[str] = None
+    language: Optional[str] = None
+    stargazers_count: int = 0
+    forks_count: int = 0
+    open_issues_count: int = 0
+    updated_at: Optional[str] = None
+    topics: List[str] = []
+    default_branch: Optional[str] = None
+    owner_type: Optional[str] = None
+    license: Optional[str] = None
+
+    # mapping-style access kept for callers that treat repos as dicts
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
 
 
 class DataSource(Protocol):
     async def search_repositories(self, query: str, per_page: int = 10) -> List[RepoCandidate]:
         ...
-
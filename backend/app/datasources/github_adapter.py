@@ -1,5 +1,13 @@
+import asyncio
+import random
+import time
+
 import httpx
-from typing import List
+import msgspec
+from aiolimiter import AsyncLimiter
+from cachetools import LRUCache
+from functools import lru_cache
+from typing import Any, List
 from .base import DataSource, RepoCandidate
 try:
     from ..config import get_settings
@@ -7,78 +15,326 @@ except Exception as e:
     from config import get_settings
 
 
+# only the fields RepoCandidate carries, so one round trip returns everything we score on
+_GRAPHQL_REPO_FIELDS = """
+... on Repository {
+  nameWithOwner
+  url
+  description
+  primaryLanguage { name }
+  stargazerCount
+  forkCount
+  issues(states: OPEN) { totalCount }
+  pushedAt
+  updatedAt
+  repositoryTopics(first: 20) { nodes { topic { name } } }
+  defaultBranchRef { name }
+  owner { __typename }
+  licenseInfo { spdxId }
+}
+"""
+
+
+# retries on 403/429 rate-limit replies before surfacing the error
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_MAX_WAIT = 10.0
+
+
+def _rate_limit_wait(resp: httpx.Response) -> float | None:
+    """Seconds to wait before retrying a rate-limited reply, or None if it should not be retried."""
+    if resp.status_code not in (403, 429):
+        return None
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    if resp.headers.get("X-RateLimit-Remaining") == "0":
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if reset and reset.isdigit():
+            return max(int(reset) - time.time(), 0.0)
+        return 0.0
+    # a plain 403 is a permission error, only 429 is always a rate limit
+    return 0.0 if resp.status_code == 429 else None
+
+
+class _GitHubOwner(msgspec.Struct):
+    type: str | None = None
+
+
+class _GitHubLicense(msgspec.Struct):
+    spdx_id: str | None = None
+
+
+class _GitHubRepo(msgspec.Struct):
+    """REST repository payload (search item or /repos/{full_name}); unknown fields are skipped."""
+
+    full_name: str | None = None
+    html_url: str | None = None
+    description: str | None = None
+    language: str | None = None
+    stargazers_count: int = 0
+    forks_count: int = 0
+    open_issues_count: int = 0
+    pushed_at: str | None = None
+    updated_at: str | None = None
+    topics: List[str] = []
+    default_branch: str | None = None
+    owner: _GitHubOwner | None = None
+    license: _GitHubLicense | None = None
+
+
+class _GitHubSearchResponse(msgspec.Struct):
+    items: List[_GitHubRepo] = []
+
+
+_search_decoder = msgspec.json.Decoder(_GitHubSearchResponse)
+_repo_decoder = msgspec.json.Decoder(_GitHubRepo)
+
+
+def _to_candidate(repo: _GitHubRepo) -> RepoCandidate:
+    return RepoCandidate(
+        full_name=repo.full_name,
+        html_url=repo.html_url,
+        description=repo.description,
+        language=repo.language,
+        stargazers_count=repo.stargazers_count,
+        forks_count=repo.forks_count,
+        open_issues_count=repo.open_issues_count,
+        updated_at=repo.pushed_at or repo.updated_at,
+        topics=repo.topics,
+        default_branch=repo.default_branch,
+        owner_type=repo.owner.type if repo.owner else None,
+        license=repo.license.spdx_id if repo.license else None,
+    )
+
+
+class GitHubAPIError(RuntimeError):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@lru_cache
+def get_client() -> httpx.AsyncClient:
+    """Process-wide GitHub client so every adapter reuses one keep-alive pool."""
+    settings = get_settings()
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "LX-OSS-Finder",
+    }
+    if settings.github_token:
+        headers["Authorization"] = f"Bearer {settings.github_token}"
+    client_kwargs = {
+        "base_url": str(settings.github_base_url),
+        "headers": headers,
+        "http2": True,
+        "limits": httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+    }
+    # httpx proxies should be a dict with protocol keys
+    if settings.github_proxy:
+        # Convert proxy string to httpx format
+        proxy_url = settings.github_proxy
+        if proxy_url.startswith("http://") or proxy_url.startswith("https://"):
+            client_kwargs["proxies"] = {"http://": proxy_url, "https://": proxy_url}
+        elif proxy_url.startswith("socks5://"):
+            # For SOCKS5, need to use httpx with socks support
+            client_kwargs["proxies"] = {"http://": proxy_url, "https://": proxy_url}
+        else:
+            # Default to http
+            client_kwargs["proxies"] = {"http://": proxy_url, "https://": proxy_url}
+    return httpx.AsyncClient(**client_kwargs)
+
+
+class _GqlName(msgspec.Struct):
+    name: str | None = None
+
+
+class _GqlTopic(msgspec.Struct):
+    topic: _GqlName
+
+
+class _GqlTopics(msgspec.Struct):
+    nodes: List[_GqlTopic] = []
+
+
+class _GqlCount(msgspec.Struct, rename="camel"):
+    total_count: int = 0
+
+
+class _GqlOwner(msgspec.Struct):
+    typename: str | None = msgspec.field(default=None, name="__typename")
+
+
+class _GqlLicense(msgspec.Struct, rename="camel"):
+    spdx_id: str | None = None
+
+
+class _GqlRepo(msgspec.Struct, rename="camel"):
+    name_with_owner: str | None = None
+    url: str | None = None
+    description: str | None = None
+    primary_language: _GqlName | None = None
+    stargazer_count: int = 0
+    fork_count: int = 0
+    issues: _GqlCount | None = None
+    pushed_at: str | None = None
+    updated_at: str | None = None
+    repository_topics: _GqlTopics | None = None
+    default_branch_ref: _GqlName | None = None
+    owner: _GqlOwner | None = None
+    license_info: _GqlLicense | None = None
+
+
+class _GqlSearch(msgspec.Struct):
+    nodes: List[_GqlRepo | None] = []
+
+
+class _GqlResponse(msgspec.Struct):
+    data: dict[str, _GqlSearch | None] | None = None
+    errors: List[Any] | None = None
+
+
+_graphql_decoder = msgspec.json.Decoder(_GqlResponse)
+
+
+def _graphql_to_candidate(node: _GqlRepo) -> RepoCandidate:
+    return RepoCandidate(
+        full_name=node.name_with_owner,
+        html_url=node.url,
+        description=node.description,
+        language=node.primary_language.name if node.primary_language else None,
+        stargazers_count=node.stargazer_count,
+        forks_count=node.fork_count,
+        open_issues_count=node.issues.total_count if node.issues else 0,
+        updated_at=node.pushed_at or node.updated_at,
+        topics=[t.topic.name for t in node.repository_topics.nodes] if node.repository_topics else [],
+        default_branch=node.default_branch_ref.name if node.default_branch_ref else None,
+        owner_type=node.owner.typename if node.owner else None,
+        license=node.license_info.spdx_id if node.license_info else None,
+    )
+
+
 class GitHubAdapter(DataSource):
     def __init__(self):
         self.settings = get_settings()
-        headers = {
-            "Accept": "application/vnd.github+json",
-            "User-Agent": "LX-OSS-Finder",
-        }
+        # auth / accept headers live on the shared client; per-call headers carry only overrides
+        self.client = get_client()
+        # request key -> (ETag, parsed payload); a 304 reply is free against the rate limit
+        self._etags: LRUCache = LRUCache(maxsize=512)
+        # search API allows 30 requests/minute for authenticated callers
+        self._search_limiter = AsyncLimiter(30, 60)
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            resp = await self.client.request(method, url, **kwargs)
+            wait = _rate_limit_wait(resp)
+            if wait is None or attempt == RATE_LIMIT_RETRIES:
+                return resp
+            # full jitter so concurrent callers don't retry in lockstep
+            await asyncio.sleep(min(wait, RATE_LIMIT_MAX_WAIT) + random.uniform(0, 2**attempt))
+        return resp
+
+    @staticmethod
+    def _conditional_headers(cached: tuple | None) -> dict | None:
+        # take the (etag, payload) entry read before sending: it may be LRU-evicted while the request is out
+        if not cached:
+            return None
+        return {"If-None-Match": cached[0]}
+
+    def _remember_etag(self, key, resp: httpx.Response, payload) -> None:
+        etag = resp.headers.get("ETag")
+        if etag:
+            self._etags[key] = (etag, payload)
+
+    async def search_repositories(
+        self, query: str, per_page: int = 10, sort: str | None = None, order: str = "desc"
+    ) -> List[RepoCandidate]:
+        # GraphQL requires auth; anonymous callers stay on REST
         if self.settings.github_token:
-            headers["Authorization"] = f"Bearer {self.settings.github_token}"
-        self.headers = headers
-        client_kwargs = {
-            "base_url": str(self.settings.github_base_url),
+            gql_query = f"{query} sort:{sort}-{order}" if sort and sort != "best" else query
+            try:
+                found = await self.graphql_search([gql_query], per_page=per_page)
+                return found[gql_query]
+            except GitHubAPIError:
+                pass
+        return await self._rest_search(query, per_page=per_page, sort=sort, order=order)
+
+    async def graphql_search(self, queries: List[str], per_page: int = 10) -> dict[str, List[RepoCandidate]]:
+        """用一次 GraphQL 请求执行多个仓库搜索，返回 {query: [RepoCandidate, ...]}"""
+        var_defs = ", ".join(f"$q{i}: String!" for i in range(len(queries)))
+        aliases = "\n".join(
+            f"q{i}: search(query: $q{i}, type: REPOSITORY, first: $first) {{ nodes {{ {_GRAPHQL_REPO_FIELDS} }} }}"
+            for i in range(len(queries))
+        )
+        payload = {
+            "query": f"query({var_defs}, $first: Int!) {{\n{aliases}\n}}",
+            "variables": {"first": per_page, **{f"q{i}": q for i, q in enumerate(queries)}},
         }
-        # httpx proxies should be a dict with protocol keys
-        if self.settings.github_proxy:
-            # Convert proxy string to httpx format
-            proxy_url = self.settings.github_proxy
-            if proxy_url.startswith("http://") or proxy_url.startswith("https://"):
-                client_kwargs["proxies"] = {"http://": proxy_url, "https://": proxy_url}
-            elif proxy_url.startswith("socks5://"):
-                # For SOCKS5, need to use httpx with socks support
-                client_kwargs["proxies"] = {"http://": proxy_url, "https://": proxy_url}
-            else:
-                # Default to http
-                client_kwargs["proxies"] = {"http://": proxy_url, "https://": proxy_url}
-        self.client = httpx.AsyncClient(**client_kwargs)
+        try:
+            resp = await self._send("POST", "/graphql", json=payload)
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            raise GitHubAPIError(f"GitHub GraphQL {status}: {exc.response.text}", status_code=status) from exc
+        except httpx.RequestError as exc:
+            raise GitHubAPIError(f"GitHub GraphQL request error: {type(exc).__name__} {repr(exc)}") from exc
 
-    async def search_repositories(
+        try:
+            body = _graphql_decoder.decode(resp.content)
+        except msgspec.DecodeError as exc:
+            raise GitHubAPIError(f"GitHub GraphQL decode error: {exc}") from exc
+        if body.errors or not body.data:
+            raise GitHubAPIError(f"GitHub GraphQL errors: {body.errors}")
+        results: dict[str, List[RepoCandidate]] = {}
+        for i, q in enumerate(queries):
+            found = body.data.get(f"q{i}")
+            nodes = found.nodes if found else []
+            results[q] = [_graphql_to_candidate(node) for node in nodes if node and node.name_with_owner]
+        return results
+
+    async def _rest_search(
         self, query: str, per_page: int = 10, sort: str | None = None, order: str = "desc"
     ) -> List[RepoCandidate]:
         params = {"q": query, "per_page": per_page}
         if sort and sort != "best":
             params["sort"] = sort
             params["order"] = order
+        etag_key = ("search", query, per_page, sort, order)
+        cached = self._etags.get(etag_key)
         try:
-            resp = await self.client.get("/search/repositories", params=params, headers=self.headers, timeout=20)
+            async with self._search_limiter:
+                resp = await self._send(
+                    "GET", "/search/repositories", params=params, headers=self._conditional_headers(cached)
+                )
+            if resp.status_code == 304 and cached:
+                return cached[1]
             resp.raise_for_status()
         except httpx.HTTPStatusError as exc:
             body = exc.response.text
             status = exc.response.status_code
-            raise RuntimeError(f"GitHub {status}: {body}") from exc
+            raise GitHubAPIError(f"GitHub {status}: {body}", status_code=status) from exc
         except httpx.RequestError as exc:
-            raise RuntimeError(f"GitHub request error: {type(exc).__name__} {repr(exc)}") from exc
-
-        data = resp.json()
-        items = data.get("items", [])
-        results: List[RepoCandidate] = []
-        for item in items:
-            results.append(
-                RepoCandidate(
-                    {
-                        "full_name": item.get("full_name"),
-                        "html_url": item.get("html_url"),
-                        "description": item.get("description"),
-                        "language": item.get("language"),
-                        "stargazers_count": item.get("stargazers_count", 0),
-                        "forks_count": item.get("forks_count", 0),
-                        "open_issues_count": item.get("open_issues_count", 0),
-                        "updated_at": item.get("pushed_at") or item.get("updated_at"),
-                        "topics": item.get("topics", []),
-                        "default_branch": item.get("default_branch"),
-                        "owner_type": (item.get("owner") or {}).get("type"),
-                        "license": (item.get("license") or {}).get("spdx_id"),
-                    }
-                )
-            )
+            raise GitHubAPIError(f"GitHub request error: {type(exc).__name__} {repr(exc)}") from exc
+
+        try:
+            data = _search_decoder.decode(resp.content)
+        except msgspec.DecodeError as exc:
+            raise GitHubAPIError(f"GitHub response decode error: {exc}") from exc
+        results = [_to_candidate(item) for item in data.items]
+        self._remember_etag(etag_key, resp, results)
         return results
 
     async def get_repository(self, full_name: str) -> RepoCandidate | None:
         """根据 full_name 获取单个仓库的详细信息"""
+        etag_key = ("repo", full_name)
+        cached = self._etags.get(etag_key)
         try:
-            resp = await self.client.get(f"/repos/{full_name}", headers=self.headers, timeout=20)
+            resp = await self._send("GET", f"/repos/{full_name}", headers=self._conditional_headers(cached))
+            if resp.status_code == 304 and cached:
+                return cached[1]
             resp.raise_for_status()
         except httpx.HTTPStatusError as exc:
             # 404 或其他错误，返回 None
@@ -86,21 +342,9 @@ class GitHubAdapter(DataSource):
         except httpx.RequestError:
             return None
 
-        item = resp.json()
-        return RepoCandidate(
-            {
-                "full_name": item.get("full_name"),
-                "html_url": item.get("html_url"),
-                "description": item.get("description"),
-                "language": item.get("language"),
-                "stargazers_count": item.get("stargazers_count", 0),
-                "forks_count": item.get("forks_count", 0),
-                "open_issues_count": item.get("open_issues_count", 0),
-                "updated_at": item.get("pushed_at") or item.get("updated_at"),
-                "topics": item.get("topics", []),
-                "default_branch": item.get("default_branch"),
-                "owner_type": (item.get("owner") or {}).get("type"),
-                "license": (item.get("license") or {}).get("spdx_id"),
-            }
-        )
-
+        try:
+            candidate = _to_candidate(_repo_decoder.decode(resp.content))
+        except msgspec.DecodeError:
+            return None
+        self._remember_etag(etag_key, resp, candidate)
+        return candidate
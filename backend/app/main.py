@@ -1,118 +1,334 @@
-import json
+import asyncio
+import hashlib
+import heapq
+import orjson
+import unicodedata
 from loguru import logger
-from datetime import datetime, timedelta
-from typing import List, AsyncGenerator
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import AsyncGenerator, List, NamedTuple, Sequence, Tuple
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
 
 try:
     from .config import get_settings
-    from .datasources.github_adapter import GitHubAdapter
+    from .datasources.github_adapter import GitHubAdapter, GitHubAPIError, get_client
     from .schemas import RepoResult, SearchRequest, SearchResponse
-    from .services.cache import InMemoryCache
-    from .services.intent_parser import IntentParser
-    from .services.reasoner import Reasoner
-    from .services.repo_recommender import RepoRecommender
-    from .services.scoring import compute_score
+    from .services.cache import InMemoryCache, SingleFlight
+    from .services.intent_parser import ParsedIntent, heuristic_parse
+    from .services.llm_client import aclose_clients
+    from .services.scoring import compute_score, compute_scores
 except Exception as e:
     from config import get_settings
-    from datasources.github_adapter import GitHubAdapter
+    from datasources.github_adapter import GitHubAdapter, GitHubAPIError, get_client
     from schemas import RepoResult, SearchRequest, SearchResponse
-    from services.cache import InMemoryCache
-    from services.intent_parser import IntentParser
-    from services.reasoner import Reasoner
-    from services.repo_recommender import RepoRecommender
-    from services.scoring import compute_score
+    from services.cache import InMemoryCache, SingleFlight
+    from services.intent_parser import ParsedIntent, heuristic_parse
+    from services.llm_client import aclose_clients
+    from services.scoring import compute_score, compute_scores
 
 settings = get_settings()
-app = FastAPI(title="LX OSS Finder", version="0.1.0")
+
+github = GitHubAdapter()
+cache = InMemoryCache()
+intent_cache = InMemoryCache()
+gh_results_cache = InMemoryCache()
+# /search and /search/stream share cache keys, so either endpoint can join the other's in-flight run
+search_flight = SingleFlight()
+
+
+class SearchIncomplete(RuntimeError):
+    """A led search ended (client gone, cancelled or pipeline error) without producing a response."""
+
+# LLM-backed services are built on first use so /health and cache hits skip the SDK setup
+_intent_parser = None
+_reasoner = None
+_repo_recommender = None
+
+
+def get_intent_parser():
+    global _intent_parser
+    if _intent_parser is None:
+        try:
+            from .services.intent_parser import IntentParser
+        except Exception:
+            from services.intent_parser import IntentParser
+        _intent_parser = IntentParser()
+    return _intent_parser
+
+
+def get_reasoner():
+    global _reasoner
+    if _reasoner is None:
+        try:
+            from .services.reasoner import Reasoner
+        except Exception:
+            from services.reasoner import Reasoner
+        _reasoner = Reasoner()
+    return _reasoner
+
+
+def get_repo_recommender():
+    global _repo_recommender
+    if _repo_recommender is None:
+        try:
+            from .services.repo_recommender import RepoRecommender
+        except Exception:
+            from services.repo_recommender import RepoRecommender
+        _repo_recommender = RepoRecommender()
+    return _repo_recommender
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _intent_parser, _reasoner, _repo_recommender
+    # a previous lifespan (reload, tests) closed the shared pool; start this one with a fresh client
+    if github.client.is_closed:
+        github.client = get_client()
+    # warm DNS/TLS to GitHub and any lazy SDK state so the first search is hot
+    try:
+        await github.client.get("/rate_limit")
+    except Exception as exc:
+        logger.warning(f"[启动预热] GitHub 预热失败: {exc}")
+    try:
+        await asyncio.wait_for(get_intent_parser().parse("warmup"), 2.0)
+    except Exception as exc:
+        logger.warning(f"[启动预热] 意图解析预热失败: {type(exc).__name__}: {exc}")
+    yield
+    await github.client.aclose()
+    get_client.cache_clear()
+    await aclose_clients()
+    # the services hold LLMClients bound to the pools just closed; rebuild them on next use
+    _intent_parser = _reasoner = _repo_recommender = None
+
+
+app = FastAPI(
+    title="LX OSS Finder",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # explicit lists + max_age let browsers cache the preflight instead of sending OPTIONS every time
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["content-type", "authorization", "cache-control", "if-none-match"],
+    expose_headers=["ETag"],
+    max_age=86400,
 )
 
-github = GitHubAdapter()
-intent_parser = IntentParser()
-reasoner = Reasoner()
-repo_recommender = RepoRecommender()
-cache = InMemoryCache()
+def normalize_query(query: str) -> str:
+    # NFKC folds full-width forms (common in Chinese input) before casefolding
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
 
+def _cache_key(query: str, **params) -> str:
+    payload = {"query": normalize_query(query), **params}
+    return hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
 
-def build_search_query(
-    keywords: List[str],
-    languages: List[str],
-    filters: List[str],
+
+async def parse_intent(query: str, use_cache: bool = True) -> ParsedIntent:
+    key = normalize_query(query)
+    # use_cache=False only skips the lookups; the fresh result still refreshes the caches
+    parsed = await intent_cache.get(key) if use_cache else None
+    if parsed is None:
+        parsed = await get_intent_parser().parse(query, use_cache=use_cache)
+        await intent_cache.set(key, parsed)
+    # callers patch keywords in place, keep the cached copy pristine
+    return parsed.model_copy(deep=True)
+
+
+async def search_github(gh_query: str, per_page: int, sort: str | None, use_cache: bool = True) -> list:
+    key = _cache_key(gh_query, per_page=per_page, sort=sort)
+    cached = await gh_results_cache.get(key) if use_cache else None
+    if isinstance(cached, GitHubAPIError):
+        raise cached
+    if cached is not None:
+        return cached
+    try:
+        repos = await github.search_repositories(gh_query, per_page=per_page, sort=sort, order="desc")
+    except GitHubAPIError as exc:
+        if exc.status_code and exc.status_code >= 500:
+            await gh_results_cache.set(key, exc, ttl=settings.negative_cache_ttl_seconds)
+        raise
+    ttl = None if repos else settings.negative_cache_ttl_seconds
+    await gh_results_cache.set(key, repos, ttl=ttl)
+    return repos
+
+
+SEARCH_SCOPES = ("name", "description", "readme")
+
+
+def _dedup(seq: Sequence[str]) -> List[str]:
+    """Case-insensitive dedup keeping the first spelling and the original order."""
+    out: dict = {}
+    for s in seq:
+        out.setdefault(s.lower(), s)
+    return list(out.values())
+
+
+def build_qualifiers(
+    languages: Sequence[str],
+    filters: Sequence[str],
     include_name: bool,
     include_description: bool,
     include_readme: bool,
-    include_topics: bool,
     pushed_within_days: int,
     min_stars: int,
 ) -> str:
-    def _dedup_keep(seq: List[str]) -> List[str]:
-        seen = set()
-        out: List[str] = []
-        for s in seq:
-            key = s.lower()
-            if key in seen:
-                continue
-            seen.add(key)
-            out.append(s)
-        return out
+    """Keyword-independent qualifier tail; built once per request and shared by the primary and fallback queries."""
+    # resolve the date here so cached qualifiers roll over with the calendar
+    cutoff = (datetime.utcnow() - timedelta(days=pushed_within_days)).date() if pushed_within_days > 0 else None
+    return _build_qualifiers(
+        tuple(languages),
+        tuple(filters),
+        include_name,
+        include_description,
+        include_readme,
+        cutoff,
+        min_stars,
+    )
 
-    def _is_ascii(s: str) -> bool:
-        try:
-            s.encode("ascii")
-            return True
-        except UnicodeEncodeError:
-            return False
 
-    terms = [f'"{kw}"' if " " in kw else kw for kw in keywords]
-    scopes = []
-    if include_name:
-        scopes.append("name")
-    if include_description:
-        scopes.append("description")
-    if include_readme:
-        scopes.append("readme")
-    scope_str = f"in:{','.join(scopes)}" if scopes else ""
-    advanced = [scope_str] if scope_str else []
+def build_search_query(keywords: Sequence[str], qualifiers: str, include_topics: bool) -> str:
+    terms = _build_terms(tuple(keywords), include_topics)
+    return f"{terms} {qualifiers}" if qualifiers else terms
+
+
+@lru_cache(maxsize=1024)
+def _build_qualifiers(
+    languages: Tuple[str, ...],
+    filters: Tuple[str, ...],
+    include_name: bool,
+    include_description: bool,
+    include_readme: bool,
+    cutoff: date | None,
+    min_stars: int,
+) -> str:
+    scopes = [
+        scope
+        for scope, enabled in zip(SEARCH_SCOPES, (include_name, include_description, include_readme))
+        if enabled
+    ]
+    advanced = [f"in:{','.join(scopes)}"] if scopes else []
     if languages:
         advanced += [f"language:{lang}" for lang in languages]
-    if pushed_within_days > 0:
-        cutoff = (datetime.utcnow() - timedelta(days=pushed_within_days)).date()
+    if cutoff is not None:
         advanced.append(f"pushed:>{cutoff}")
     if min_stars > 0:
         advanced.append(f"stars:>={min_stars}")
-    if include_topics:
-        topic_candidates = [kw for kw in keywords if " " not in kw and _is_ascii(kw)]
-        topic_candidates = _dedup_keep(topic_candidates)[:3]
-        advanced += [f"topic:{kw.lower()}" for kw in topic_candidates]
     advanced.extend(filters)
-    return " ".join([*terms, *advanced])
+    return " ".join(advanced)
+
+
+@lru_cache(maxsize=1024)
+def _build_terms(keywords: Tuple[str, ...], include_topics: bool) -> str:
+    keywords = _dedup(keywords)
+    terms = [f'"{kw}"' if " " in kw else kw for kw in keywords]
+    if include_topics:
+        topic_candidates = [kw for kw in keywords if " " not in kw and kw.isascii()][:3]
+        terms += [f"topic:{kw.lower()}" for kw in topic_candidates]
+    return " ".join(terms)
 
 
 def select_keywords(keywords: List[str], max_keywords: int = 4) -> List[str]:
-    deduped = []
-    seen = set()
-    for kw in keywords:
-        key = kw.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(kw)
+    deduped = _dedup(keywords)
     return deduped[:max_keywords] if max_keywords > 0 else deduped
 
 
-def sse(event: str, data: dict) -> str:
+async def start_speculative_search(
+    query: str, per_page: int, sort: str | None, query_opts: dict, include_topics: bool, use_cache: bool = True
+) -> tuple[str, asyncio.Task] | None:
+    """Start the GitHub search for the heuristic keywords while the LLM intent parse is in flight."""
+    if use_cache and await intent_cache.get(normalize_query(query)) is not None:
+        return None
+    intent_parser = get_intent_parser()
+    if not (intent_parser.llm and intent_parser.llm.client):
+        return None  # heuristic parsing is instant, nothing to overlap
+    guess = heuristic_parse(query)
+    qualifiers = build_qualifiers(guess.languages, guess.filters, **query_opts)
+    gh_query = build_search_query(select_keywords(guess.keywords, max_keywords=4), qualifiers, include_topics)
+    task = asyncio.create_task(search_github(gh_query, per_page=per_page, sort=sort, use_cache=use_cache))
+    # a guess may fail unobserved (e.g. the real query raised first); mark its exception as retrieved
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return gh_query, task
+
+
+async def resolve_speculative_search(
+    spec: tuple[str, asyncio.Task] | None, gh_query: str, per_page: int, sort: str | None, use_cache: bool = True
+) -> list:
+    """Run the real query; a guess that missed is merged in as extra candidates, its quota is already spent."""
+    if spec is None:
+        return await search_github(gh_query, per_page=per_page, sort=sort, use_cache=use_cache)
+    spec_query, spec_task = spec
+    if spec_query == gh_query:
+        return await spec_task
+    repos = await search_github(gh_query, per_page=per_page, sort=sort, use_cache=use_cache)
+    try:
+        guessed = await spec_task
+    except Exception:
+        return repos
+    seen = {repo.get("full_name") for repo in repos}
+    merged = repos + [repo for repo in guessed if repo.get("full_name") not in seen]
+    if len(merged) <= per_page:
+        return merged
+    # keep the best-scoring per_page (in their original order) so downstream explain work stays bounded
+    scores = compute_scores(merged)
+    keep = sorted(heapq.nlargest(per_page, range(len(merged)), key=scores.__getitem__))
+    return [merged[i] for i in keep]
+
+
+def _repo_to_result(repo, score: float, reason: str) -> RepoResult:
+    """Build a RepoResult from adapter data; it is already typed, so skip pydantic validation."""
+    full_name = repo.get("full_name") or ""
+    return RepoResult.model_construct(
+        name=full_name.split("/")[-1],
+        full_name=full_name,
+        html_url=repo.get("html_url"),
+        description=repo.get("description"),
+        language=repo.get("language"),
+        stars=repo.get("stargazers_count") or 0,
+        updated_at=repo.get("updated_at") or "",
+        topics=repo.get("topics") or [],
+        score=score,
+        reason=reason,
+    )
+
+
+async def _score_and_explain(query: str, repo, use_cache: bool = True) -> RepoResult:
+    reason = await get_reasoner().explain(query, repo, use_cache)
+    return _repo_to_result(repo, compute_score(repo), reason)
+
+
+async def rank_and_explain(query: str, repos: Sequence, k: int, use_cache: bool = True) -> List[RepoResult]:
+    """Score every repo, keep the top k, and explain only those in one batched LLM call."""
+    scores = compute_scores(repos)
+    top = heapq.nlargest(k, range(len(repos)), key=scores.__getitem__)
+    picked = [repos[i] for i in top]
+    reasons = await get_reasoner().explain_many(query, picked, use_cache)
+    return [_repo_to_result(repo, scores[i], reason) for i, repo, reason in zip(top, picked, reasons)]
+
+
+def sse_raw(event: str, payload: bytes) -> bytes:
+    """Frame an already-serialized JSON payload as one SSE event."""
+    return b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
+
+
+def sse(event: str, data: dict) -> bytes:
     # default=str converts types like HttpUrl/Enum to JSON-friendly strings
-    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+    return sse_raw(event, orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS))
+
+
+def sse_model(event: str, model: BaseModel) -> bytes:
+    # pydantic-core serializes straight to JSON bytes, no intermediate dict
+    return sse_raw(event, model.__pydantic_serializer__.to_json(model))
 
 
 @app.get("/health")
@@ -120,15 +336,95 @@ async def health():
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
 
 
-@app.post("/search", response_model=SearchResponse)
-async def search(body: SearchRequest):
-    cached = cache.get(body.query) if body.use_cache else None
+SEARCH_CACHE_CONTROL = "public, s-maxage=3600, stale-while-revalidate=86400"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match is "*" or a comma-separated list; compared weakly, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    target = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == target:
+            return True
+    return False
+
+
+def conditional_json(request: Request, response: SearchResponse, cacheable: bool = True) -> Response:
+    """Serialize once, tag with a weak content ETag and answer 304 when the client already has it."""
+    payload = response.__pydantic_serializer__.to_json(response)
+    etag = f'W/"{hashlib.blake2b(payload).hexdigest()[:16]}"'
+    headers = {"ETag": etag}
+    # only results the caller allowed to be cached may sit in shared/CDN caches
+    if cacheable:
+        headers["Cache-Control"] = SEARCH_CACHE_CONTROL
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+def encode_replay(response: SearchResponse, selected_keywords: List[str]) -> bytes:
+    """Encode a finished SearchResponse as the same SSE sequence a live stream emits."""
+    return b"".join(
+        [
+            # the live stream announces the keywords it searched with, not every parsed keyword
+            sse("intent", {"keywords": selected_keywords}),
+            *(sse_model("item", item) for item in response.results),
+            sse("done", {"count": len(response.results)}),
+        ]
+    )
+
+
+class CachedSearch(NamedTuple):
+    response: SearchResponse
+    # the replayed event stream, encoded once so stream cache hits and joined streams are a single write
+    sse: bytes
+
+
+def finish_search(response: SearchResponse, selected_keywords: List[str]) -> CachedSearch:
+    return CachedSearch(response, encode_replay(response, selected_keywords))
+
+
+def _with_query(response: SearchResponse, query: str) -> SearchResponse:
+    # cache keys normalize case/width/whitespace; echo back this requester's own spelling
+    return response if response.query == query else response.model_copy(update={"query": query})
+
+
+# the handler returns pre-serialized bytes; keep the model only for the OpenAPI docs
+@app.post("/search", response_model=None, responses={200: {"model": SearchResponse}})
+async def search(body: SearchRequest, request: Request):
+    cache_key = _cache_key(body.query, **body.model_dump(exclude={"query", "use_cache"}))
+    cached = await cache.get(cache_key) if body.use_cache else None
     if cached:
-        return cached
+        return conditional_json(request, _with_query(cached.response, body.query))
 
     try:
-        parsed = await intent_parser.parse(body.query)
+        entry = await search_flight.do(
+            cache_key, lambda: run_search(body, cache_key), cancelled_error=SearchIncomplete
+        )
+    except SearchIncomplete:
+        # joined a leader (stream or /search) that never finished; nothing to share, so run the search here
+        entry = await run_search(body, cache_key)
+    return conditional_json(request, _with_query(entry.response, body.query), body.use_cache)
+
+
+async def run_search(body: SearchRequest, cache_key: str) -> CachedSearch:
+    query_opts = dict(
+        include_name=body.include_name,
+        include_description=body.include_description,
+        include_readme=body.include_readme,
+        pushed_within_days=body.pushed_within_days,
+        min_stars=body.min_stars,
+    )
+    spec = await start_speculative_search(
+        body.query, body.per_page, body.sort, query_opts, body.include_topics, body.use_cache
+    )
+    try:
+        parsed = await parse_intent(body.query, body.use_cache)
     except RuntimeError as exc:
+        if spec is not None:
+            spec[1].cancel()
         raise HTTPException(status_code=500, detail=str(exc))
 
     # ensure at least user query as keyword to avoid empty searches
@@ -137,69 +433,32 @@ async def search(body: SearchRequest):
 
     selected_keywords = select_keywords(parsed.keywords, max_keywords=4)
 
-    gh_query = build_search_query(
-        selected_keywords,
-        parsed.languages,
-        parsed.filters,
-        include_name=body.include_name,
-        include_description=body.include_description,
-        include_readme=body.include_readme,
-        include_topics=body.include_topics,
-        pushed_within_days=body.pushed_within_days,
-        min_stars=body.min_stars,
-    )
+    qualifiers = build_qualifiers(parsed.languages, parsed.filters, **query_opts)
+    gh_query = build_search_query(selected_keywords, qualifiers, body.include_topics)
     try:
-        repos = await github.search_repositories(
-            gh_query, per_page=body.per_page, sort=body.sort, order="desc"
+        repos = await resolve_speculative_search(
+            spec, gh_query, per_page=body.per_page, sort=body.sort, use_cache=body.use_cache
         )
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"GitHub API error: {exc}")
 
     # fallback: if no results and we had more than 1 keyword, retry with first 2 keywords
     if not repos and len(selected_keywords) > 1:
-        narrowed = select_keywords(selected_keywords, max_keywords=2)
-        gh_query = build_search_query(
-            narrowed,
-            parsed.languages,
-            parsed.filters,
-            include_name=body.include_name,
-            include_description=body.include_description,
-            include_readme=body.include_readme,
-            include_topics=body.include_topics,
-            pushed_within_days=body.pushed_within_days,
-            min_stars=body.min_stars,
-        )
+        narrowed = selected_keywords[:2]
+        gh_query = build_search_query(narrowed, qualifiers, body.include_topics)
         try:
-            repos = await github.search_repositories(
-                gh_query, per_page=body.per_page, sort=body.sort, order="desc"
-            )
+            repos = await search_github(gh_query, per_page=body.per_page, sort=body.sort, use_cache=body.use_cache)
         except Exception as exc:
             raise HTTPException(status_code=502, detail=f"GitHub API error: {exc}")
 
-    results: List[RepoResult] = []
-    for repo in repos:
-        score = compute_score(repo)
-        reason = await reasoner.explain(body.query, repo)
-        results.append(
-            RepoResult(
-                name=repo.get("full_name", "").split("/")[-1],
-                full_name=repo.get("full_name"),
-                html_url=repo.get("html_url"),
-                description=repo.get("description"),
-                language=repo.get("language"),
-                stars=repo.get("stargazers_count", 0),
-                updated_at=repo.get("updated_at", ""),
-                topics=repo.get("topics", []),
-                score=score,
-                reason=reason,
-            )
-        )
-
-    results = sorted(results, key=lambda r: r.score, reverse=True)[: body.limit]
-    response = SearchResponse(query=body.query, intent_keywords=parsed.keywords, results=results)
+    # rank first so the LLM only explains the repos that are actually returned
+    results = await rank_and_explain(body.query, repos, body.limit, body.use_cache)
+    entry = finish_search(
+        SearchResponse(query=body.query, intent_keywords=parsed.keywords, results=results), selected_keywords
+    )
     if body.use_cache:
-        cache.set(body.query, response)
-    return response
+        await cache.set(cache_key, entry)
+    return entry
 
 
 @app.get("/search/stream")
@@ -216,174 +475,211 @@ async def search_stream(
     min_stars: int = Query(0, ge=0),
     sort: str | None = Query("best"),
 ):
-    cached = cache.get(query) if use_cache else None
+    cache_key = _cache_key(
+        query,
+        per_page=per_page,
+        limit=limit,
+        include_name=include_name,
+        include_description=include_description,
+        include_readme=include_readme,
+        include_topics=include_topics,
+        pushed_within_days=pushed_within_days,
+        min_stars=min_stars,
+        sort=sort,
+    )
+    cached = await cache.get(cache_key) if use_cache else None
     if cached:
-        async def cached_stream() -> AsyncGenerator[str, None]:
-            yield sse("intent", {"keywords": cached.intent_keywords})
-            for item in cached.results:
-                yield sse("item", item.model_dump(mode="json"))
-            yield sse("done", {"count": len(cached.results)})
-        return StreamingResponse(cached_stream(), media_type="text/event-stream")
-
-    async def event_generator() -> AsyncGenerator[str, None]:
+        return StreamingResponse(iter([cached.sse]), media_type="text/event-stream")
+
+    async def joined_stream(inflight: asyncio.Future) -> AsyncGenerator[bytes, None]:
+        try:
+            entry = await asyncio.shield(inflight)
+        except Exception as exc:
+            yield sse("error", {"detail": str(exc)})
+            return
+        yield entry.sse
+
+    inflight = search_flight.join(cache_key)
+    if inflight is not None:
+        return StreamingResponse(joined_stream(inflight), media_type="text/event-stream")
+    # event_generator drops the final entry here so led_stream can hand it to joined requests
+    outcome: dict = {}
+
+    query_opts = dict(
+        include_name=include_name,
+        include_description=include_description,
+        include_readme=include_readme,
+        pushed_within_days=pushed_within_days,
+        min_stars=min_stars,
+    )
+
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        spec = await start_speculative_search(query, per_page, sort, query_opts, include_topics, use_cache)
+        # the recommendation only needs the raw query, so its LLM round trip overlaps everything below
+        logger.info(f"[流式搜索] 开始调用 LLM 推荐，query={query}")
+        llm_task = asyncio.create_task(get_repo_recommender().recommend(query, max_repos=5, use_cache=use_cache))
         try:
-            parsed = await intent_parser.parse(query)
+            parsed = await parse_intent(query, use_cache)
             if not parsed.keywords:
                 parsed.keywords = [query]
             selected_keywords = select_keywords(parsed.keywords, max_keywords=4)
+            qualifiers = build_qualifiers(parsed.languages, parsed.filters, **query_opts)
             yield sse("intent", {"keywords": selected_keywords})
         except Exception as exc:
+            if spec is not None:
+                spec[1].cancel()
+            llm_task.cancel()
             yield sse("error", {"detail": f"Intent parse failed: {exc}"})
             return
 
-        async def do_query(keywords: List[str]):
-            gh_query_local = build_search_query(
-                keywords,
-                parsed.languages,
-                parsed.filters,
-                include_name=include_name,
-                include_description=include_description,
-                include_readme=include_readme,
-                include_topics=include_topics,
-                pushed_within_days=pushed_within_days,
-                min_stars=min_stars,
-            )
+        async def do_query(keywords: List[str], spec=None):
+            gh_query_local = build_search_query(keywords, qualifiers, include_topics)
             yield sse("debug-query", {"github_query": gh_query_local})
             try:
-                repos_local = await github.search_repositories(
-                    gh_query_local, per_page=per_page, sort=sort, order="desc"
+                repos_local = await resolve_speculative_search(
+                    spec, gh_query_local, per_page=per_page, sort=sort, use_cache=use_cache
                 )
                 yield repos_local
             except Exception as exc:
                 yield sse("error", {"detail": f"GitHub API error: {exc}"})
                 yield None
 
-        # Parallel: keyword search + LLM recommendation
-        # Start keyword search
+        # Keyword search runs while the LLM recommendation is in flight
         repos = None
         logger.info(f"[流式搜索] 开始关键词搜索，关键词: {selected_keywords}")
-        async for result in do_query(selected_keywords):
-            if isinstance(result, str):
+        async for result in do_query(selected_keywords, spec):
+            if isinstance(result, bytes):
                 yield result  # debug or error already formatted
             else:
                 repos = result
         if repos is None:
             logger.warning("[流式搜索] 关键词搜索返回 None，可能出错")
+            llm_task.cancel()
             return
 
         logger.info(f"[流式搜索] 关键词搜索完成，返回 {len(repos) if repos else 0} 个仓库")
 
         # Fallback with fewer keywords if empty and we had multiple keywords
         if not repos and len(selected_keywords) > 1:
-            narrowed = select_keywords(selected_keywords, max_keywords=2)
+            narrowed = selected_keywords[:2]
             logger.info(f"[流式搜索] 关键词搜索结果为空，尝试使用更少的关键词: {narrowed}")
             async for result in do_query(narrowed):
-                if isinstance(result, str):
+                if isinstance(result, bytes):
                     yield result
                 else:
                     repos = result
             if repos is None:
                 logger.warning("[流式搜索] 回退搜索也返回 None")
+                llm_task.cancel()
                 return
             logger.info(f"[流式搜索] 回退搜索完成，返回 {len(repos)} 个仓库")
 
-        # Start LLM recommendation in parallel
-        llm_recommended_names = []
-        try:
-            logger.info(f"[流式搜索] 开始调用 LLM 推荐，query={query}")
-            llm_recommended_names = await repo_recommender.recommend(query, max_repos=5)
-            logger.info(f"[流式搜索] LLM 推荐完成，返回 {len(llm_recommended_names)} 个仓库: {llm_recommended_names}")
-        except Exception as e:
-            logger.warning(f"[流式搜索] LLM 推荐失败: {type(e).__name__}: {e}")
-            import traceback
-            logger.error(f"[流式搜索] LLM 推荐异常堆栈:\n{traceback.format_exc()}")
-            # LLM recommendation failed, continue with search results only
-
         # Convert search results to dict for deduplication
         seen = set()
         results: List[RepoResult] = []
 
         # Process keyword search results first
         logger.info(f"[流式搜索] 开始处理关键词搜索结果，共 {len(repos)} 个仓库")
+        # launch all explanations up front and stream each item as soon as it is ready
+        pending = []
         for repo in repos:
             full_name = repo.get("full_name")
             if not full_name or full_name in seen:
                 continue
             seen.add(full_name)
+            pending.append(asyncio.create_task(_score_and_explain(query, repo, use_cache)))
+        for fut in asyncio.as_completed(pending):
             try:
-                score = compute_score(repo)
-                reason = await reasoner.explain(query, repo)
-                item = RepoResult(
-                    name=full_name.split("/")[-1],
-                    full_name=full_name,
-                    html_url=repo.get("html_url"),
-                    description=repo.get("description"),
-                    language=repo.get("language"),
-                    stars=repo.get("stargazers_count", 0),
-                    updated_at=repo.get("updated_at", ""),
-                    topics=repo.get("topics", []),
-                    score=score,
-                    reason=reason,
-                )
-                results.append(item)
-                # stream as soon as single item is ready
-                yield sse("item", item.model_dump(mode="json"))
-                logger.debug(f"[流式搜索] 已流式返回关键词搜索结果: {full_name}")
+                item = await fut
             except Exception as exc:
-                logger.error(f"[流式搜索] 处理关键词搜索结果失败: {full_name}, 错误: {exc}")
+                logger.error(f"[流式搜索] 处理关键词搜索结果失败: {exc}")
                 yield sse("error", {"detail": f"Scoring error: {exc}"})
+                continue
+            results.append(item)
+            yield sse_model("item", item)
+            logger.debug(f"[流式搜索] 已流式返回关键词搜索结果: {item.full_name}")
         
         logger.info(f"[流式搜索] 关键词搜索结果处理完成，共 {len(results)} 个有效结果")
 
+        llm_recommended_names = []
+        try:
+            llm_recommended_names = await llm_task
+            logger.info(f"[流式搜索] LLM 推荐完成，返回 {len(llm_recommended_names)} 个仓库: {llm_recommended_names}")
+        except Exception as e:
+            logger.warning(f"[流式搜索] LLM 推荐失败: {type(e).__name__}: {e}")
+            import traceback
+            logger.error(f"[流式搜索] LLM 推荐异常堆栈:\n{traceback.format_exc()}")
+            # LLM recommendation failed, continue with search results only
+
         # Process LLM recommended repos (fetch details and add if not already seen)
         logger.info(f"[流式搜索] 开始处理 {len(llm_recommended_names)} 个 LLM 推荐仓库")
+        pending_names = []
         for full_name in llm_recommended_names:
             if full_name in seen:
                 logger.debug(f"[流式搜索] 跳过已存在的仓库: {full_name}")
                 continue
             seen.add(full_name)
+            pending_names.append(full_name)
+        # fetch all details at once, then explain them all at once
+        details = await asyncio.gather(
+            *(github.get_repository(full_name) for full_name in pending_names), return_exceptions=True
+        )
+        candidates = []
+        for full_name, repo_detail in zip(pending_names, details):
+            if isinstance(repo_detail, Exception):
+                yield sse("error", {"detail": f"LLM recommended repo fetch error: {repo_detail}"})
+                continue
+            if not repo_detail:
+                logger.warning(f"[流式搜索] 无法获取仓库详情: {full_name}")
+                continue
+            candidates.append(repo_detail)
+        reasons = await get_reasoner().explain_many(query, candidates, use_cache)
+        for repo_detail, reason in zip(candidates, reasons):
             try:
-                repo_detail = await github.get_repository(full_name)
-                if not repo_detail:
-                    logger.warning(f"[流式搜索] 无法获取仓库详情: {full_name}")
-                    continue
-                # Convert RepoCandidate to dict format for scoring
-                repo_dict = {
-                    "full_name": repo_detail.get("full_name"),
-                    "html_url": repo_detail.get("html_url"),
-                    "description": repo_detail.get("description"),
-                    "language": repo_detail.get("language"),
-                    "stargazers_count": repo_detail.get("stargazers_count", 0),
-                    "updated_at": repo_detail.get("updated_at"),
-                    "topics": repo_detail.get("topics", []),
-                }
-                score = compute_score(repo_dict)
-                reason = await reasoner.explain(query, repo_dict)
-                item = RepoResult(
-                    name=full_name.split("/")[-1],
-                    full_name=full_name,
-                    html_url=repo_detail.get("html_url"),
-                    description=repo_detail.get("description"),
-                    language=repo_detail.get("language"),
-                    stars=repo_detail.get("stargazers_count", 0),
-                    updated_at=repo_detail.get("updated_at") or "",
-                    topics=repo_detail.get("topics") or [],
-                    score=score,
-                    reason=reason,
-                )
+                item = _repo_to_result(repo_detail, compute_score(repo_detail), reason)
                 results.append(item)
-                yield sse("item", item.model_dump(mode="json"))
+                yield sse_model("item", item)
             except Exception as exc:
                 yield sse("error", {"detail": f"LLM recommended repo fetch error: {exc}"})
 
         # Final sort and limit
-        results = sorted(results, key=lambda r: r.score, reverse=True)[:limit]
+        results = heapq.nlargest(limit, results, key=lambda r: r.score)
+        outcome["entry"] = finish_search(
+            SearchResponse(query=query, intent_keywords=parsed.keywords, results=results), selected_keywords
+        )
         if use_cache:
-            cache.set(query, SearchResponse(query=query, intent_keywords=parsed.keywords, results=results))
+            await cache.set(cache_key, outcome["entry"])
         yield sse("done", {"count": len(results)})
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    async def led_stream() -> AsyncGenerator[bytes, None]:
+        # registered on first iteration so an unstarted response can't leave a dangling future behind
+        fut = search_flight.lead(cache_key)
+        if fut is None:
+            # another request started leading after the join() check above; follow it instead
+            async for chunk in joined_stream(search_flight.join(cache_key)):
+                yield chunk
+            return
+        try:
+            async for chunk in event_generator():
+                yield chunk
+        finally:
+            if "entry" in outcome:
+                search_flight.resolve(cache_key, fut, outcome["entry"])
+            else:
+                search_flight.fail(cache_key, fut, SearchIncomplete("搜索未完成"))
+
+    return StreamingResponse(led_stream(), media_type="text/event-stream")
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8020)
+
+    # workers need an import string; __spec__ is set under `python -m app.main`, unset for `python app/main.py`
+    # each worker is its own process with its own InMemoryCache / single-flight map, so caches aren't shared
+    # uvloop + httptools are picked up automatically when installed (uvicorn[standard])
+    uvicorn.run(
+        f"{__spec__.name}:app" if __spec__ else "main:app",
+        host="0.0.0.0",
+        port=8020,
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 2)),
+    )
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel
 
 
 class SearchRequest(BaseModel):
@@ -19,7 +19,7 @@ class SearchRequest(BaseModel):
 class RepoResult(BaseModel):
     name: str
     full_name: str
-    html_url: HttpUrl
+    html_url: str  # taken verbatim from GitHub, results are built with model_construct
     description: Optional[str]
     language: Optional[str]
     stars: int
@@ -0,0 +1,67 @@
+"""heuristic_parse 使用的静态词表，导入时构建一次；均为只读（frozenset / MappingProxyType + tuple）。"""
+
+from types import MappingProxyType
+
+COMMON_LANGS = frozenset({
+    "python",
+    "java",
+    "javascript",
+    "typescript",
+    "go",
+    "rust",
+    "php",
+    "c++",
+    "c#",
+    "swift",
+    "kotlin",
+    "dart",
+})
+
+CHINESE_HINTS = MappingProxyType({
+    "抖音": ("douyin", "tiktok"),
+    "爬虫": ("crawler", "scraper"),
+    "弹幕": ("danmu", "barrage", "bullet screen"),
+    "直播": ("live streaming", "live stream"),
+    "短视频": ("short video",),
+    "视频": ("video",),
+    "下载": ("download",),
+    "评论": ("comment",),
+    "账号": ("account",),
+    "登录": ("login", "auth"),
+    "ocr": ("ocr", "optical character recognition"),
+})
+
+# 需求描述词黑名单（这些词不应该作为搜索关键词）
+REQUIREMENT_WORDS = frozenset({
+    "快", "速度快", "快速", "高效", "高效能", "高性能", "performance", "fast", "quick", "speed",
+    "好", "好用", "简单", "容易", "easy", "simple", "good",
+    "新", "最新", "最新版", "new", "latest",
+    "稳定", "可靠", "stable", "reliable",
+    "免费", "开源", "free", "open source",
+    "轻量", "轻量级", "lightweight", "light",
+    "强大", "powerful", "strong",
+    "完整", "complete", "full",
+    "专业", "professional", "pro",
+})
+
+# 需求描述词到技术关键词的映射
+REQUIREMENT_TO_TECH = MappingProxyType({
+    "快": ("fast", "performance", "optimized", "speed", "efficient"),
+    "速度快": ("fast", "performance", "optimized", "speed", "efficient"),
+    "快速": ("fast", "performance", "optimized", "speed"),
+    "高效": ("efficient", "performance", "optimized"),
+    "高性能": ("performance", "high-performance", "optimized"),
+    "好用": ("easy", "simple", "user-friendly"),
+    "简单": ("simple", "easy", "minimal"),
+    "新": ("latest", "modern", "recent"),
+    "最新": ("latest", "recent", "up-to-date"),
+    "稳定": ("stable", "reliable"),
+    "可靠": ("reliable", "stable"),
+    "免费": ("free", "open-source"),
+    "开源": ("open-source", "open source"),
+    "轻量": ("lightweight", "light"),
+    "轻量级": ("lightweight", "light"),
+    "强大": ("powerful", "feature-rich"),
+    "完整": ("complete", "full-featured"),
+    "专业": ("professional", "enterprise"),
+})
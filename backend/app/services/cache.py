@@ -1,27 +1,136 @@
+import asyncio
 import time
-from typing import Any, Dict, Tuple
+from typing import Any, Awaitable, Callable, Dict, Protocol
+
+from cachetools import TLRUCache
+
+try:
+    from loguru import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
 try:
     from ..config import get_settings
 except Exception as e:
     from config import get_settings
 
 
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Any:
+        ...
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        ...
+
+
 class InMemoryCache:
     def __init__(self):
         self.settings = get_settings()
-        self.store: Dict[str, Tuple[float, Any]] = {}
+        # entries are (ttl, value) so each one can carry its own lifetime; LRU-evicted past maxsize
+        self.store: TLRUCache = TLRUCache(
+            maxsize=self.settings.cache_max_entries,
+            ttu=lambda _key, entry, now: now + entry[0],
+            # monotonic so NTP/wall-clock jumps can't expire entries early or keep them forever
+            timer=time.monotonic,
+        )
+        self._lock = asyncio.Lock()
 
-    def get(self, key: str):
-        entry = self.store.get(key)
-        if not entry:
+    async def get(self, key: str):
+        async with self._lock:
+            entry = self.store.get(key)
+        if entry is None:
             return None
-        expires_at, value = entry
-        if time.time() > expires_at:
-            self.store.pop(key, None)
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: int | None = None):
+        if ttl is None:
+            ttl = self.settings.cache_ttl_seconds
+        async with self._lock:
+            self.store[key] = (ttl, value)
+
+
+class RedisCache:
+    """String values in Redis, shared across workers and restarts; errors degrade to cache misses."""
+
+    def __init__(self, url: str, prefix: str = ""):
+        # deferred so the memory backend never imports redis
+        from redis import asyncio as aioredis
+        from redis.exceptions import RedisError
+
+        self.settings = get_settings()
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._errors = (RedisError, OSError)
+
+    async def get(self, key: str):
+        try:
+            return await self.client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning(f"[缓存] Redis 读取失败: {type(e).__name__}: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int | None = None):
+        if ttl is None:
+            ttl = self.settings.cache_ttl_seconds
+        try:
+            await self.client.set(self.prefix + key, value, ex=ttl)
+        except self._errors as e:
+            logger.warning(f"[缓存] Redis 写入失败: {type(e).__name__}: {e}")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class SingleFlight:
+    """Coalesce concurrent work for the same key onto one in-flight future."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def join(self, key: str) -> asyncio.Future | None:
+        return self._inflight.get(key)
+
+    def lead(self, key: str) -> asyncio.Future | None:
+        """Register as leader for key; returns None if someone else already leads it."""
+        if key in self._inflight:
             return None
-        return value
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        return fut
+
+    def _release(self, key: str, fut: asyncio.Future):
+        # only drop the entry this leader registered, never a later leader's
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+
+    def resolve(self, key: str, fut: asyncio.Future, result: Any):
+        self._release(key, fut)
+        if not fut.done():
+            fut.set_result(result)
 
-    def set(self, key: str, value: Any):
-        ttl = self.settings.cache_ttl_seconds
-        self.store[key] = (time.time() + ttl, value)
+    def fail(self, key: str, fut: asyncio.Future, exc: BaseException):
+        self._release(key, fut)
+        if not fut.done():
+            fut.set_exception(exc)
+            # followers may already be gone; don't warn about an unretrieved exception
+            fut.exception()
 
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        cancelled_error: Callable[[str], Exception] = RuntimeError,
+    ) -> Any:
+        """Run fn once per key; followers share its result. A cancelled leader fails them with cancelled_error."""
+        fut = self.lead(key)
+        if fut is None:
+            # shield so one follower disconnecting doesn't cancel the shared result
+            return await asyncio.shield(self.join(key))
+        try:
+            result = await fn()
+        except BaseException as exc:
+            self.fail(key, fut, exc if isinstance(exc, Exception) else cancelled_error("in-flight request cancelled"))
+            raise
+        self.resolve(key, fut, result)
+        return result
@@ -1,7 +1,10 @@
-from typing import List
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
 
 from pydantic import BaseModel
 
+from ._data import CHINESE_HINTS, COMMON_LANGS, REQUIREMENT_TO_TECH, REQUIREMENT_WORDS
 from .llm_client import LLMClient
 
 
@@ -12,77 +15,54 @@ class ParsedIntent(BaseModel):
     filters: List[str] = []
 
 
-COMMON_LANGS = {
-    "python",
-    "java",
-    "javascript",
-    "typescript",
-    "go",
-    "rust",
-    "php",
-    "c++",
-    "c#",
-    "swift",
-    "kotlin",
-    "dart",
-}
-
-CHINESE_HINTS = {
-    "抖音": ["douyin", "tiktok"],
-    "爬虫": ["crawler", "scraper"],
-    "弹幕": ["danmu", "barrage", "bullet screen"],
-    "直播": ["live streaming", "live stream"],
-    "短视频": ["short video"],
-    "视频": ["video"],
-    "下载": ["download"],
-    "评论": ["comment"],
-    "账号": ["account"],
-    "登录": ["login", "auth"],
-    "ocr": ["ocr", "optical character recognition"],
-}
-
-# 需求描述词黑名单（这些词不应该作为搜索关键词）
-REQUIREMENT_WORDS = {
-    "快", "速度快", "快速", "高效", "高效能", "高性能", "performance", "fast", "quick", "speed",
-    "好", "好用", "简单", "容易", "easy", "simple", "good",
-    "新", "最新", "最新版", "new", "latest",
-    "稳定", "可靠", "stable", "reliable",
-    "免费", "开源", "free", "open source",
-    "轻量", "轻量级", "lightweight", "light",
-    "强大", "powerful", "strong",
-    "完整", "complete", "full",
-    "专业", "professional", "pro",
-}
-
-# 需求描述词到技术关键词的映射
-REQUIREMENT_TO_TECH = {
-    "快": ["fast", "performance", "optimized", "speed", "efficient"],
-    "速度快": ["fast", "performance", "optimized", "speed", "efficient"],
-    "快速": ["fast", "performance", "optimized", "speed"],
-    "高效": ["efficient", "performance", "optimized"],
-    "高性能": ["performance", "high-performance", "optimized"],
-    "好用": ["easy", "simple", "user-friendly"],
-    "简单": ["simple", "easy", "minimal"],
-    "新": ["latest", "modern", "recent"],
-    "最新": ["latest", "recent", "up-to-date"],
-    "稳定": ["stable", "reliable"],
-    "可靠": ["reliable", "stable"],
-    "免费": ["free", "open-source"],
-    "开源": ["open-source", "open source"],
-    "轻量": ["lightweight", "light"],
-    "轻量级": ["lightweight", "light"],
-    "强大": ["powerful", "feature-rich"],
-    "完整": ["complete", "full-featured"],
-    "专业": ["professional", "enterprise"],
-}
+# 分词前把中英文逗号和"的"统一替换成空格，一次 translate 代替链式 replace
+_SPLIT_TABLE = str.maketrans({"，": " ", ",": " ", "的": " "})
+# 预先小写化的键，匹配时直接在 lowered 上查找（小写键命中原串必然也命中 lowered）
+_HINT_ITEMS = [(zh.lower(), hints) for zh, hints in CHINESE_HINTS.items()]
+_REQ_TECH_ITEMS = [(req.lower(), tech) for req, tech in REQUIREMENT_TO_TECH.items()]
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # 长词优先，保证同一起点命中最长的词
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# 中文提示词按最长匹配、不重叠扫描：短视频 不会再额外命中其中的 视频
+_HINT_RE = re.compile(_alternation(zh for zh, _ in _HINT_ITEMS))
+_SCAN_TERMS = {req for req, _ in _REQ_TECH_ITEMS}
+# 需求词则要全部找出；零宽前瞻让匹配可以重叠（速度快 里的 快 也会命中）
+_SCAN_RE = re.compile(f"(?=({_alternation(_SCAN_TERMS)}))")
+# 同一起点只返回最长词，较短的前缀词（快速 → 快）在这里补齐
+_SCAN_PREFIXES = {term: [p for p in _SCAN_TERMS if term.startswith(p)] for term in _SCAN_TERMS}
+_REQUIREMENT_RE = re.compile(_alternation(REQUIREMENT_WORDS))
+
+
+def _scan_terms(lowered: str) -> set:
+    found = set(_HINT_RE.findall(lowered))
+    for match in _SCAN_RE.finditer(lowered):
+        found.update(_SCAN_PREFIXES[match.group(1)])
+    return found
 
 
 def heuristic_parse(user_query: str) -> ParsedIntent:
+    user_query = " ".join(user_query.split())
+    keywords, langs = _heuristic_parse(user_query)
+    return ParsedIntent(
+        keywords=list(keywords),
+        languages=list(langs),
+        description=user_query,
+        filters=[],
+    )
+
+
+@lru_cache(maxsize=2048)
+def _heuristic_parse(user_query: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """纯函数部分，按查询缓存；返回不可变的 (keywords, languages)，由 heuristic_parse 重建 ParsedIntent。"""
     lowered = user_query.lower()
     langs = [lang for lang in COMMON_LANGS if lang in lowered]
     
     # Extract technical keywords, filtering out requirement words
-    rough = user_query.replace("，", " ").replace(",", " ").replace("的", " ").split()
+    rough = user_query.translate(_SPLIT_TABLE).split()
     keywords = []
     for kw in rough:
         kw = kw.strip()
@@ -99,23 +79,22 @@ def heuristic_parse(user_query: str) -> ParsedIntent:
         # Keep technical keywords
         keywords.append(kw)
     
+    found = _scan_terms(lowered)
+
     # Add Chinese->English hint expansions
-    for zh, hints in CHINESE_HINTS.items():
-        if zh.lower() in lowered:
+    for zh, hints in _HINT_ITEMS:
+        if zh in found:
             keywords.extend(hints)
     
     # Convert requirement words in query to tech keywords
-    for req_word, tech_keywords in REQUIREMENT_TO_TECH.items():
-        if req_word in user_query or req_word.lower() in lowered:
+    for req_word, tech_keywords in _REQ_TECH_ITEMS:
+        if req_word in found:
             keywords.extend(tech_keywords)
     
     # If no keywords found, use the original query (but clean it)
     if not keywords:
         # Remove requirement words from raw query
-        cleaned = user_query
-        for req in REQUIREMENT_WORDS:
-            cleaned = cleaned.replace(req, " ").replace(req.lower(), " ")
-        cleaned = " ".join(cleaned.split())
+        cleaned = " ".join(_REQUIREMENT_RE.sub(" ", user_query).split())
         if cleaned:
             keywords.append(cleaned)
         else:
@@ -131,12 +110,7 @@ def heuristic_parse(user_query: str) -> ParsedIntent:
         seen.add(kw_lower)
         deduped.append(kw)
     
-    return ParsedIntent(
-        keywords=deduped[:6],
-        languages=langs,
-        description=user_query,
-        filters=[],
-    )
+    return tuple(deduped[:6]), tuple(langs)
 
 
 class IntentParser:
@@ -146,7 +120,7 @@ class IntentParser:
         except Exception:
             self.llm = None
 
-    async def parse(self, user_query: str) -> ParsedIntent:
+    async def parse(self, user_query: str, use_cache: bool = True) -> ParsedIntent:
         if not self.llm or not self.llm.client:
             return heuristic_parse(user_query)
 
@@ -165,7 +139,7 @@ class IntentParser:
         )
         user_prompt = f"User need: {user_query}"
         try:
-            content = await self.llm.chat(system_prompt, user_prompt)
+            content = await self.llm.chat(system_prompt, user_prompt, use_cache=use_cache)
             data = ParsedIntent.model_validate_json(content)
             # if LLM returns too few keywords, augment with heuristic hints (especially Chinese -> English)
             if len(data.keywords) < 3:
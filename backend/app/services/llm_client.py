@@ -1,12 +1,85 @@
-from typing import Optional
+import asyncio
+import contextlib
+import hashlib
+import random
+from typing import AsyncIterator, Dict, Optional, Tuple
 
-from openai import AsyncOpenAI
+import httpx
+import orjson
+
+try:
+    from loguru import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
 
 try:
     from ..config import get_settings
 except Exception as e:
     from config import get_settings
 
+from .cache import CacheBackend, InMemoryCache, RedisCache, SingleFlight
+
+
+# attempts for rate-limited / transient failures; the SDK's own retries are off so they don't stack
+LLM_MAX_ATTEMPTS = 5
+
+# one AsyncOpenAI (and one httpx pool) per (api_key, base_url) for the whole process,
+# shared by IntentParser / Reasoner / RepoRecommender so keep-alive connections get reused
+_CLIENT_CACHE: Dict[Tuple[str, Optional[str]], "AsyncOpenAI"] = {}
+
+
+def _get_client(api_key: str, base_url: Optional[str]) -> "AsyncOpenAI":
+    key = (api_key, base_url)
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        # deferred so processes without an API key never pay the SDK import
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=20,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0),
+                timeout=20,
+            ),
+        )
+        _CLIENT_CACHE[key] = client
+    return client
+
+
+def _make_response_cache() -> CacheBackend:
+    settings = get_settings()
+    if settings.llm_cache_backend == "redis":
+        if settings.redis_url:
+            return RedisCache(settings.redis_url, prefix="llm:")
+        logger.warning("[LLM缓存] LLM_CACHE_BACKEND=redis 但未配置 REDIS_URL，使用内存缓存")
+    return InMemoryCache()
+
+
+# completed replies keyed by (model, prompts, response_format); identical concurrent prompts share one call
+_response_cache = _make_response_cache()
+_inflight = SingleFlight()
+
+
+def is_bad_request(exc: BaseException) -> bool:
+    """True for a 400 from the provider, e.g. a response_format it doesn't support."""
+    import openai
+
+    return isinstance(exc, openai.BadRequestError)
+
+
+async def aclose_clients():
+    """Close the shared LLM connection pools; called on app shutdown."""
+    clients = list(_CLIENT_CACHE.values())
+    _CLIENT_CACHE.clear()
+    for client in clients:
+        await client.close()
+    if isinstance(_response_cache, RedisCache):
+        await _response_cache.aclose()
+
 
 class LLMClient:
     def __init__(self):
@@ -16,22 +89,91 @@ class LLMClient:
             self.client = None
             self.default_model = None
             return
-        self.client = AsyncOpenAI(
-            api_key=settings.openai_api_key,
-            base_url=str(settings.openai_api_base) if settings.openai_api_base else None,
-            timeout=20,
-            max_retries=2,
+        self.cache_ttl = settings.llm_cache_ttl_seconds
+        self.client = _get_client(
+            settings.openai_api_key,
+            str(settings.openai_api_base) if settings.openai_api_base else None,
         )
         self.default_model = settings.openai_model
 
-    async def chat(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> str:
+    async def chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: Optional[str] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        limiter: Optional[asyncio.Semaphore] = None,
+        use_cache: bool = True,
+    ) -> str:
+        """limiter, if given, is held per HTTP attempt only, never across cache hits or backoff sleeps.
+        use_cache=False skips the cached-reply lookup; the fresh reply is still stored."""
         if not self.client:
             raise RuntimeError("LLM client not configured")
         model = model or self.default_model or "gpt-4o-mini"
-        resp = await self.client.chat.completions.create(
-            model=model,
+        key = hashlib.sha1(orjson.dumps([model, system_prompt, user_prompt, response_format])).hexdigest()
+        cached = await _response_cache.get(key) if use_cache else None
+        if cached is not None:
+            return cached
+
+        async def complete() -> str:
+            content = await self._complete(system_prompt, user_prompt, model, response_format, limiter)
+            if content:
+                await _response_cache.set(key, content, ttl=self.cache_ttl)
+            return content
+
+        return await _inflight.do(key, complete)
+
+    async def chat_stream(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream completion tokens as they arrive; bypasses the reply cache and retries."""
+        if not self.client:
+            raise RuntimeError("LLM client not configured")
+        stream = await self.client.chat.completions.create(
+            model=model or self.default_model or "gpt-4o-mini",
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
             temperature=0.3,
             timeout=20,
+            stream=True,
         )
-        return resp.choices[0].message.content or ""
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    async def _complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        response_format: Optional[Dict[str, str]],
+        limiter: Optional[asyncio.Semaphore],
+    ) -> str:
+        import openai
+
+        retryable = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+        payload = {
+            "model": model,
+            "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+            "temperature": 0.3,
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        # serialize once with orjson (UTF-8, no \u escapes) and skip the SDK's per-call param transform
+        body = orjson.dumps(payload)
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            try:
+                async with limiter if limiter is not None else contextlib.nullcontext():
+                    raw = await self.client.post(
+                        "/chat/completions",
+                        content=body,
+                        cast_to=httpx.Response,
+                        options={"timeout": 20},
+                    )
+                break
+            except retryable:
+                if attempt == LLM_MAX_ATTEMPTS - 1:
+                    raise
+                # jittered linear backoff so concurrent callers don't retry in lockstep;
+                # the limiter is already released, so other callers keep using the slot meanwhile
+                await asyncio.sleep(random.uniform(2, 4) * (attempt + 1))
+        # only choices[0].message.content is used; read it off the body instead of building the SDK models
+        data = orjson.loads(raw.content)
+        return data["choices"][0]["message"].get("content") or ""
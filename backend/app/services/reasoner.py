@@ -1,6 +1,27 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, AsyncIterator, List, Tuple
 
-from .llm_client import LLMClient
+import orjson
+
+try:
+    from ..config import get_settings
+except Exception as e:
+    from config import get_settings
+
+from .llm_client import LLMClient, is_bad_request
+
+
+SYSTEM_PROMPT = (
+    "Recommend GitHub repos concisely and factually, using only the given metadata. "
+    "Cover suitability, effort and risks (maintenance, docs) in 1-2 sentences."
+)
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + ' One entry per repo, JSON only: {"explanations":[{"idx":0,"text":"..."}]}'
+_SNIPPET_KEYS = ("full_name", "description", "stargazers_count", "updated_at", "language", "topics")
+
+
+def _repo_snippet(repo: Dict[str, Any]) -> str:
+    # compact JSON instead of labelled lines: fewer prompt tokens per repo
+    return orjson.dumps({key: repo.get(key) for key in _SNIPPET_KEYS}).decode()
 
 
 class Reasoner:
@@ -9,30 +30,81 @@ class Reasoner:
             self.llm = LLMClient()
         except Exception:
             self.llm = None
+        # caps simultaneous explanation requests so a burst of results doesn't trip provider rate limits;
+        # LLMClient holds it per HTTP attempt, not across retry backoff
+        self.semaphore = asyncio.Semaphore(max(get_settings().llm_concurrency, 1))
 
-    async def explain(self, user_query: str, repo: Dict[str, Any]) -> str:
-        fallback = (
+    def fallback(self, repo: Dict[str, Any]) -> str:
+        return (
             f"{repo.get('full_name')}：活跃度 {repo.get('stargazers_count', 0)}⭐，最近更新 {repo.get('updated_at', '')}，"
             "请查看 README 示例与 issue 活跃度评估可用性。"
         )
+
+    def _explain_prompts(self, user_query: str, repo: Dict[str, Any]) -> Tuple[str, str]:
+        return SYSTEM_PROMPT, f"Q:{user_query}\nR:{_repo_snippet(repo)}"
+
+    async def explain(self, user_query: str, repo: Dict[str, Any], use_cache: bool = True) -> str:
+        fallback = self.fallback(repo)
         if not self.llm or not self.llm.client:
             return fallback
 
-        system_prompt = (
-            "You craft concise, factual recommendations for GitHub repos. "
-            "Base your answer only on provided metadata. 1-2 sentences. "
-            "Mention suitability, effort level, and any risks (maintenance, docs)."
-        )
-        repo_snippet = (
-            f"Name: {repo.get('full_name')}\n"
-            f"Description: {repo.get('description')}\n"
-            f"Stars: {repo.get('stargazers_count')}, Updated: {repo.get('updated_at')}, "
-            f"Language: {repo.get('language')}\n"
-            f"Topics: {', '.join(repo.get('topics', []))}"
-        )
-        user_prompt = f"User need: {user_query}\nRepo data:\n{repo_snippet}"
         try:
-            return await self.llm.chat(system_prompt, user_prompt)
+            return await self.llm.chat(
+                *self._explain_prompts(user_query, repo), limiter=self.semaphore, use_cache=use_cache
+            )
         except Exception:
             return fallback
 
+    async def explain_stream(self, user_query: str, repo: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield the explanation as it is generated; falls back to the template if nothing arrived."""
+        if not self.llm or not self.llm.client:
+            yield self.fallback(repo)
+            return
+        started = False
+        try:
+            async for token in self.llm.chat_stream(*self._explain_prompts(user_query, repo)):
+                started = started or bool(token)
+                yield token
+        except Exception:
+            pass
+        # failed or finished without any text: the caller still gets something to show
+        if not started:
+            yield self.fallback(repo)
+
+    async def explain_many(self, user_query: str, repos: List[Dict[str, Any]], use_cache: bool = True) -> List[str]:
+        """Explain a whole batch in one LLM call; entries the model skips get the template fallback."""
+        reasons = [self.fallback(repo) for repo in repos]
+        if not repos or not self.llm or not self.llm.client:
+            return reasons
+
+        listing = "\n".join(f"{idx}:{_repo_snippet(repo)}" for idx, repo in enumerate(repos))
+        user_prompt = f"Q:{user_query}\nR:\n{listing}"
+        try:
+            content = await self.llm.chat(
+                BATCH_SYSTEM_PROMPT,
+                user_prompt,
+                response_format={"type": "json_object"},
+                limiter=self.semaphore,
+                use_cache=use_cache,
+            )
+            items = orjson.loads(content).get("explanations", [])
+        except (orjson.JSONDecodeError, AttributeError):
+            # malformed or non-object reply: fall back to one call per repo
+            return await self.explain_all(user_query, repos, use_cache)
+        except Exception as exc:
+            if is_bad_request(exc):
+                # provider without JSON mode
+                return await self.explain_all(user_query, repos, use_cache)
+            # rate limits / timeouts were already retried; N more calls would only make it worse
+            return reasons
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            idx, text = item.get("idx"), item.get("text")
+            if isinstance(idx, int) and 0 <= idx < len(reasons) and isinstance(text, str) and text.strip():
+                reasons[idx] = text.strip()
+        return reasons
+
+    async def explain_all(self, user_query: str, repos: List[Dict[str, Any]], use_cache: bool = True) -> List[str]:
+        """Explain each repo with its own call, fanned out concurrently under the semaphore."""
+        return list(await asyncio.gather(*(self.explain(user_query, repo, use_cache) for repo in repos)))
@@ -1,14 +1,51 @@
-import json
-import re
-from typing import List, Optional
+import orjson
+from typing import Any, List
 
 try:
     from loguru import logger
+    # 参数为 callable，仅在 debug 级别实际输出时才求值
+    _debug = logger.opt(lazy=True).debug
 except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
-from .llm_client import LLMClient
+    def _debug(message, *args):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(message.format(*(arg() for arg in args)))
+
+from .llm_client import LLMClient, is_bad_request
+
+
+SYSTEM_PROMPT = (
+    "You are a GitHub repository expert. Recommend well-known, actively maintained repos for the need. "
+    "Output ONLY a JSON object of full names, no markdown or prose, "
+    "e.g. {\"repos\":[\"microsoft/vscode\",\"facebook/react\"]}"
+)
+
+def _loose_parse(response: str) -> Any:
+    """宽松解析：去掉 markdown 代码块后解析，失败再截取首尾方括号之间的内容；都失败返回 None"""
+    cleaned = response.strip()
+    # 移除可能的 markdown 代码块标记
+    if cleaned.startswith("```"):
+        cleaned = cleaned.removeprefix("```json").removeprefix("```").strip().removesuffix("```")
+    cleaned = cleaned.strip()
+    _debug("[LLM推荐] 清理后:\n{}", lambda: cleaned)
+
+    try:
+        return orjson.loads(cleaned)
+    except orjson.JSONDecodeError:
+        pass
+    start, end = cleaned.find("["), cleaned.rfind("]")
+    if not 0 <= start < end:
+        logger.error(f"[LLM推荐] 未找到 JSON 数组格式")
+        return None
+    try:
+        repos = orjson.loads(cleaned[start:end + 1])
+    except orjson.JSONDecodeError:
+        logger.error(f"[LLM推荐] JSON 解析失败，无法提取有效数组")
+        return None
+    _debug("[LLM推荐] 从文本中提取到 JSON: {}", lambda: cleaned[start:end + 1])
+    return repos
 
 
 class RepoRecommender:
@@ -20,7 +57,7 @@ class RepoRecommender:
         except Exception:
             self.llm = None
 
-    async def recommend(self, user_query: str, max_repos: int = 5) -> List[str]:
+    async def recommend(self, user_query: str, max_repos: int = 5, use_cache: bool = True) -> List[str]:
         """
         基于用户需求推荐 GitHub 仓库的 full_name 列表
         返回格式: ["owner/repo1", "owner/repo2", ...]
@@ -30,69 +67,49 @@ class RepoRecommender:
             logger.warning("[LLM推荐] LLM client 未初始化，跳过推荐")
             return []
 
-        system_prompt = (
-            "You are a GitHub repository expert. Based on user needs, recommend well-known, "
-            "actively maintained GitHub repositories.\n\n"
-            "IMPORTANT: You MUST return ONLY a valid JSON array of repository full names. "
-            "Format: [\"owner/repo-name\", \"owner/repo-name\", ...]\n"
-            "Do NOT include any explanations, markdown code blocks, or other text. "
-            "Just the JSON array.\n"
-            "Example output: [\"microsoft/vscode\", \"facebook/react\", \"vercel/next.js\"]"
-        )
-        user_prompt = (
-            f"User need: {user_query}\n\n"
-            f"Recommend exactly {max_repos} GitHub repositories that best match this need. "
-            "Return ONLY a JSON array like: [\"owner1/repo1\", \"owner2/repo2\", ...]"
-        )
+        user_prompt = f"Need: {user_query}\nReturn exactly {max_repos} repos."
 
         try:
             # Use default model from config (no need to pass model explicitly)
             logger.info(f"[LLM推荐] 调用 LLM API")
-            response = await self.llm.chat(system_prompt, user_prompt)
-            logger.debug(f"[LLM推荐] 收到原始响应 (query={user_query}):\n{response}")
-            
-            # 尝试提取 JSON 数组
-            cleaned = response.strip()
-            # 移除可能的 markdown 代码块标记
-            if cleaned.startswith("```"):
-                cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned, flags=re.MULTILINE)
-                cleaned = re.sub(r"\s*```\s*$", "", cleaned, flags=re.MULTILINE)
-            cleaned = cleaned.strip()
-            logger.debug(f"[LLM推荐] 清理后:\n{cleaned}")
-
-            # 尝试从文本中提取 JSON 数组（更宽松的解析）
-            # 先尝试直接解析
             try:
-                repos = json.loads(cleaned)
-            except json.JSONDecodeError:
-                # 如果直接解析失败，尝试提取方括号内的内容
-                match = re.search(r'\[.*?\]', cleaned, re.DOTALL)
-                if match:
-                    try:
-                        repos = json.loads(match.group(0))
-                        logger.debug(f"[LLM推荐] 从文本中提取到 JSON: {match.group(0)}")
-                    except json.JSONDecodeError:
-                        logger.error(f"[LLM推荐] JSON 解析失败，无法提取有效数组")
-                        return []
-                else:
-                    logger.error(f"[LLM推荐] 未找到 JSON 数组格式")
+                response = await self.llm.chat(
+                    SYSTEM_PROMPT, user_prompt, response_format={"type": "json_object"}, use_cache=use_cache
+                )
+            except Exception as e:
+                # 仅在接口不支持 JSON mode（400 / 响应体无法解析）时去掉 response_format 重试一次；
+                # 限流、超时已在 LLMClient 内重试过，直接交给外层处理
+                if not (is_bad_request(e) or isinstance(e, orjson.JSONDecodeError)):
+                    raise
+                logger.warning(f"[LLM推荐] JSON mode 调用失败，改用普通模式: {type(e).__name__}: {e}")
+                response = await self.llm.chat(SYSTEM_PROMPT, user_prompt, use_cache=use_cache)
+            _debug("[LLM推荐] 收到原始响应 (query={}):\n{}", lambda: user_query, lambda: response)
+
+            # JSON mode 下直接解析 {"repos": [...]}
+            try:
+                parsed = orjson.loads(response)
+            except orjson.JSONDecodeError:
+                # 未遵守 JSON mode 的模型：回退到宽松解析
+                parsed = _loose_parse(response)
+                if parsed is None:
                     return []
+            repos = parsed.get("repos", []) if isinstance(parsed, dict) else parsed
 
             if isinstance(repos, list):
                 # 验证格式并过滤
                 valid = []
                 for repo in repos[:max_repos]:
-                    if isinstance(repo, str) and "/" in repo and len(repo.split("/")) == 2:
+                    if not isinstance(repo, str):
+                        continue
+                    # owner/name：恰好一个 "/"，且两侧非空
+                    i = repo.find("/")
+                    if 0 < i < len(repo) - 1 and repo.find("/", i + 1) == -1:
                         valid.append(repo)
-                logger.debug(f"[LLM推荐] 解析成功，有效仓库数: {len(valid)}, 列表: {valid}")
+                _debug("[LLM推荐] 解析成功，有效仓库数: {}, 列表: {}", lambda: len(valid), lambda: valid)
                 return valid
             else:
                 logger.warning(f"[LLM推荐] 解析结果不是列表: {type(repos)}, 值: {repos}")
                 return []
-        except json.JSONDecodeError as e:
-            logger.error(f"[LLM推荐] JSON 解析失败: {e}")
-            logger.error(f"[LLM推荐] 原始响应: {response}")
-            return []
         except Exception as e:
             error_type = type(e).__name__
             error_msg = str(e)
@@ -1,50 +1,59 @@
+import calendar
+import time
+from bisect import bisect_left
 from datetime import datetime, timezone
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List
 
+# 距上次更新的天数上限（含）及对应得分，超过最后一档为 0.3
+_FRESHNESS_DAYS = (7, 30, 90, 180, 1825)
+_FRESHNESS_SCORES = (1.0, 0.9, 0.75, 0.6, 0.5, 0.3)
 
-def freshness_score(updated_at: str) -> float:
+
+def _parse_gh_ts(value: str) -> int | None:
+    """Epoch seconds for an ISO timestamp; GitHub's fixed YYYY-MM-DDTHH:MM:SSZ shape skips the generic parser."""
     try:
-        updated = datetime.fromisoformat(updated_at.replace("Z", "+00:00")).astimezone(timezone.utc)
+        if len(value) == 20 and value[19] == "Z":
+            return calendar.timegm((
+                int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                0, 0, 0,
+            ))
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).timestamp())
     except Exception:
+        return None
+
+
+def freshness_score(updated_at: str, now: int | None = None) -> float:
+    """now: epoch seconds, defaults to the current time."""
+    today = (int(time.time()) if now is None else now) // 86400
+    return _freshness_on_day(updated_at, today)
+
+
+@lru_cache(maxsize=4096)
+def _freshness_on_day(updated_at: str, today: int) -> float:
+    # keyed by epoch day so entries stay valid for the whole day and repeat timestamps skip the parse
+    updated = _parse_gh_ts(updated_at)
+    if updated is None:
         return 0.2
-    days = (datetime.now(timezone.utc) - updated).days
-    if days <= 7:
-        return 1.0
-    if days <= 30:
-        return 0.9
-    if days <= 90:
-        return 0.75
-    if days <= 180:
-        return 0.6
-    if days <= 1825:
-        return 0.5
-    return 0.3
-
-
-def readme_hint_score(description: str | None, topics: List[str]) -> float:
-    text = (description or "").lower()
-    score = 0.2
-    if "example" in text or "demo" in text:
-        score += 0.3
-    if topics:
-        score += 0.2
-    return min(score, 1.0)
-
-
-def activity_score(stars: int, forks: int, issues: int) -> float:
-    star_component = min(stars / 5000, 1.0)
-    fork_component = min(forks / 1000, 1.0)
-    issue_component = 0.7 if issues < 20 else 0.4
-    return 0.5 * star_component + 0.3 * fork_component + 0.2 * issue_component
-
-
-def compute_score(repo: Dict[str, Any]) -> float:
-    freshness = freshness_score(repo.get("updated_at", ""))
-    activity = activity_score(
-        repo.get("stargazers_count", 0),
-        repo.get("forks_count", 0),
-        repo.get("open_issues_count", 0),
+    return _FRESHNESS_SCORES[bisect_left(_FRESHNESS_DAYS, today - updated // 86400)]
+
+
+def compute_score(repo: Dict[str, Any], now: int | None = None) -> float:
+    # activity: stars / forks / open issues; docs: example/demo hints in the description plus topics
+    freshness = freshness_score(repo.get("updated_at", ""), now)
+    issues = repo.get("open_issues_count", 0)
+    activity = (
+        0.5 * min(repo.get("stargazers_count", 0) / 5000, 1.0)
+        + 0.3 * min(repo.get("forks_count", 0) / 1000, 1.0)
+        + 0.2 * (0.7 if issues < 20 else 0.4)
     )
-    docs = readme_hint_score(repo.get("description"), repo.get("topics", []))
+    text = (repo.get("description") or "").lower()
+    docs = 0.2 + (0.3 if "example" in text or "demo" in text else 0.0) + (0.2 if repo.get("topics") else 0.0)
     return round(0.45 * freshness + 0.4 * activity + 0.15 * docs, 3)
 
+
+def compute_scores(repos: Iterable[Dict[str, Any]]) -> List[float]:
+    # one clock read for the whole batch
+    now = int(time.time())
+    return [compute_score(repo, now) for repo in repos]